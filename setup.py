@@ -2,7 +2,7 @@ from setuptools import find_packages, setup
 
 install_requires = [
     'flask>=2.1.2', 'functions-framework>=3.0.0', 'firebase-admin>=5.2.0',
-    'pyyaml>=6.0', 'typing-extensions>=4.3.0'
+    'pyyaml>=6.0', 'typing-extensions>=4.3.0', 'orjson>=3.8.0'
 ]
 
 setup(
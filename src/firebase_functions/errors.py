@@ -50,6 +50,15 @@ class FunctionsErrorCode(str, Enum):
     UNAVAILABLE = "unavailable"
     DATA_LOSS = "data-loss"
 
+    ordinal: int
+    """The member's declaration index, used to look up its HttpErrorCode."""
+
+    def __new__(cls, value: str):
+        member = str.__new__(cls, value)
+        member._value_ = value
+        member.ordinal = len(cls.__members__)
+        return member
+
 
 class HttpErrorCode:
     """
@@ -57,8 +66,11 @@ class HttpErrorCode:
     determines the HTTP status code of the response, as defined in code.proto.
     """
 
+    __slots__ = ("canonical_name", "status", "status_name")
+
     canonical_name: CanonicalErrorCodeName
     status: int
+    status_name: str
 
     def __init__(
         self,
@@ -67,35 +79,37 @@ class HttpErrorCode:
     ):
         self.canonical_name = canonical_name
         self.status = status
-
-
-error_code_map = {
-    FunctionsErrorCode.OK: HttpErrorCode(CanonicalErrorCodeName.OK, 200),
-    FunctionsErrorCode.CANCELLED: HttpErrorCode(CanonicalErrorCodeName.CANCELLED, 499),
-    FunctionsErrorCode.UNKNOWN: HttpErrorCode(CanonicalErrorCodeName.UNKNOWN, 500),
-    FunctionsErrorCode.INVALID_ARGUMENT: HttpErrorCode(
-        CanonicalErrorCodeName.INVALID_ARGUMENT, 400
-    ),
-    FunctionsErrorCode.DEADLINE_EXCEEDED: HttpErrorCode(
-        CanonicalErrorCodeName.DEADLINE_EXCEEDED, 504
-    ),
-    FunctionsErrorCode.NOT_FOUND: HttpErrorCode(CanonicalErrorCodeName.NOT_FOUND, 404),
-    FunctionsErrorCode.ALREADY_EXISTS: HttpErrorCode(
-        CanonicalErrorCodeName.ALREADY_EXISTS, 409
-    ),
-    FunctionsErrorCode.INTERNAL: HttpErrorCode(CanonicalErrorCodeName.INTERNAL, 500),
-    FunctionsErrorCode.PERMISSION_DENIED: HttpErrorCode(
-        CanonicalErrorCodeName.PERMISSION_DENIED, 403
-    ),
-    FunctionsErrorCode.UNAUTHENTICATED: HttpErrorCode(
-        CanonicalErrorCodeName.UNAUTHENTICATED, 401
-    ),
-}
+        # Cached so the error path doesn't go through the enum descriptor.
+        self.status_name = canonical_name.value
+
+
+# Indexed by FunctionsErrorCode ordinal, so this must follow its declaration order.
+error_code_map: tuple[HttpErrorCode, ...] = (
+    HttpErrorCode(CanonicalErrorCodeName.OK, 200),
+    HttpErrorCode(CanonicalErrorCodeName.CANCELLED, 499),
+    HttpErrorCode(CanonicalErrorCodeName.UNKNOWN, 500),
+    HttpErrorCode(CanonicalErrorCodeName.INVALID_ARGUMENT, 400),
+    HttpErrorCode(CanonicalErrorCodeName.DEADLINE_EXCEEDED, 504),
+    HttpErrorCode(CanonicalErrorCodeName.NOT_FOUND, 404),
+    HttpErrorCode(CanonicalErrorCodeName.ALREADY_EXISTS, 409),
+    HttpErrorCode(CanonicalErrorCodeName.PERMISSION_DENIED, 403),
+    HttpErrorCode(CanonicalErrorCodeName.UNAUTHENTICATED, 401),
+    HttpErrorCode(CanonicalErrorCodeName.RESOURCE_EXHAUSTED, 429),
+    HttpErrorCode(CanonicalErrorCodeName.FAILED_PRECONDITION, 400),
+    HttpErrorCode(CanonicalErrorCodeName.ABORTED, 409),
+    HttpErrorCode(CanonicalErrorCodeName.OUT_OF_RANGE, 400),
+    HttpErrorCode(CanonicalErrorCodeName.UNIMPLEMENTED, 501),
+    HttpErrorCode(CanonicalErrorCodeName.INTERNAL, 500),
+    HttpErrorCode(CanonicalErrorCodeName.UNAVAILABLE, 503),
+    HttpErrorCode(CanonicalErrorCodeName.DATA_LOSS, 500),
+)
+
+_lookup = error_code_map.__getitem__
 
 
 class HttpErrorWireFormat(TypedDict):
     details: NotRequired[Any]
-    status: CanonicalErrorCodeName
+    status: str
     message: str
 
 
@@ -113,22 +127,23 @@ class HttpsError(Exception):
         self.code = code
         self.message = message
         self.details = details
-        self.http_error_code = error_code_map[code]
+        # Raw code strings such as "not-found" are accepted too.
+        self.http_error_code = _lookup(FunctionsErrorCode(code).ordinal)
 
         super().__init__()
 
     def __str__(self):
-        return self.code.canonical_name.value
+        return self.http_error_code.status_name
 
-    def to_dict(self):
+    def to_dict(self) -> HttpErrorWireFormat:
         if self.details is None:
             return HttpErrorWireFormat(
-                status=self.http_error_code.canonical_name.value,
+                status=self.http_error_code.status_name,
                 message=self.message,
             )
 
         return HttpErrorWireFormat(
-            details={self.details},
-            status=self.http_error_code.canonical_name,
+            details=self.details,
+            status=self.http_error_code.status_name,
             message=self.message,
         )
@@ -2,25 +2,37 @@
 These can be raw web requests and Callable RPCs.
 """
 
-import dataclasses
+import copy
+import decimal
 import functools
+import hashlib
 import json
-import re
+import os
+import threading
+import time
 
+from datetime import date
 from enum import Enum
+from types import MappingProxyType
 from dataclasses import dataclass
+from collections import OrderedDict
 from collections.abc import Callable
 from typing import (
     Any,
     Generic,
     List,
+    NamedTuple,
     TypeVar,
     Union,
     Optional,
 )
-from firebase_admin import auth, _apps
+import firebase_admin
+from firebase_admin import auth
 
-from flask import Request, Response, jsonify
+import orjson
+from flask import Request, Response, json as flask_json
+from werkzeug.datastructures import Headers
+from werkzeug.http import http_date
 
 from functions_framework import logging
 
@@ -43,12 +55,31 @@ from firebase_functions.options import (
     VpcEgressSettings,
     Sentinel,
 )
-from firebase_functions.utils import valid_request
+from firebase_functions.utils import valid_body, valid_request
 
 T = TypeVar("T")
 
+_VERIFICATION_LABELS = {
+    "firebase-log-type": "callable-request-verification",
+}
+"""Log labels attached to every callable request verification log entry.
+Shared by all of them, so it must never be mutated."""
 
-@dataclass(frozen=True)
+_EMPTY_RESULT_BODY = orjson.dumps({"result": None})
+"""The encoded body of a callable that returns nothing."""
+
+_JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+"""orjson options matching how flask.jsonify encodes dict keys and dates."""
+
+_DIGITS_TO_ZEROS = bytes(0x30 if 0x30 <= c <= 0x39 else 0x20 for c in range(256))
+"""bytes.translate table turning every digit into "0" and anything else into
+a space."""
+
+_WIDE_INTEGER_DIGITS = b"0" * 19
+"""A run of digits long enough to be an integer orjson can't decode exactly."""
+
+
+@dataclass(frozen=True, slots=True)
 class DecodedAppCheckToken:
     """Decoded AppCheck JWT token.
 
@@ -101,12 +132,8 @@ class DecodedAppCheckToken:
     convenience, and is set as the value of the [`sub`](#sub) property.
     """
 
-    def get(self, prop: StringParam) -> Any:
-        """Get a property from the AppCheck token."""
-        pass
-
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppCheckData:
     """The IntParamerface for AppCheck tokens verified in Callable functions."""
 
@@ -114,7 +141,7 @@ class AppCheckData:
     token: DecodedAppCheckToken
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AuthData:
     """The IntParamerface for Auth tokens verified in Callable functions."""
 
@@ -145,6 +172,22 @@ class CallableRequest(Generic[T]):
     """An unverified token for a Firebase Instance ID."""
 
 
+def _https_endpoint_kwargs(options: HttpsOptions) -> dict[str, Any]:
+    """The ManifestEndpoint fields shared by on_request and on_call."""
+    return {
+        "region": options.region,
+        "availableMemoryMb": options.memory,
+        "timeoutSeconds": options.timeout_sec,
+        "minInstances": options.min_instances,
+        "maxInstances": options.max_instances,
+        "vpc": options.vpc,
+        "vpcConnectorEgressSettings": options.vpc_connector_egress_settings,
+        "ingressSettings": options.ingress,
+        "serviceAccount": options.service_account,
+        "secretEnvironmentVariables": options.secrets,
+    }
+
+
 def on_request(
     func: Callable[[Request, Response], None] = None,
     *,
@@ -205,7 +248,16 @@ def on_request(
         invoker=invoker,
     )
 
-    trigger = {} if request_options is None else request_options.metadata()
+    # Read-only so the metadata shared by this decorator can't be mutated
+    # through one of the decorated functions.
+    trigger_template = MappingProxyType(
+        {} if request_options is None else request_options.metadata())
+
+    # Everything but the entry point is known before the function is.
+    endpoint_kwargs = {
+        "httpsTrigger": HttpsTrigger(invoker=request_options.invoker),
+        **_https_endpoint_kwargs(request_options),
+    }
 
     def wrapper(func):
 
@@ -214,22 +266,9 @@ def on_request(
             func(request, response)
             return response
 
-        endpoint = ManifestEndpoint(
-            entryPoint=func.__name__,
-            httpsTrigger=HttpsTrigger(invoker=request_options.invoker),
-            region=request_options.region,
-            availableMemoryMb=request_options.memory,
-            timeoutSeconds=request_options.timeout_sec,
-            minInstances=request_options.min_instances,
-            maxInstances=request_options.max_instances,
-            vpc=request_options.vpc,
-            vpcConnectorEgressSettings=request_options.vpc_connector_egress_settings,
-            ingressSettings=request_options.ingress,
-            serviceAccount=request_options.service_account,
-            secretEnvironmentVariables=request_options.secrets,
-        )
+        endpoint = ManifestEndpoint(entryPoint=func.__name__, **endpoint_kwargs)
 
-        request_view_func.__firebase_trigger__ = trigger
+        request_view_func.__firebase_trigger__ = dict(trigger_template)
         request_view_func.__firebase_endpoint__ = endpoint
 
         return request_view_func
@@ -253,98 +292,158 @@ class TokenStatus(Enum):
     """The token is invalid."""
 
 
-class CallableTokenStatus:
-    """Check CallableTokenStatus"""
+class CallableTokenStatus(NamedTuple):
+    """The verification status of the tokens of a callable request."""
 
-    app: Optional[TokenStatus] = None
-    auth: Optional[TokenStatus] = None
+    auth: TokenStatus
+    app: TokenStatus
 
-    def __init__(self) -> None:
-        self.app = TokenStatus.INVALID
-        self.auth = TokenStatus.INVALID
+    auth_data: Optional[AuthData] = None
+    """The verified auth token, if any."""
 
-    def to_dict(self) -> dict:
-        """Set dictionary"""
-        return {
-            "app": self.app.value if self.app is not None else None,
-            "auth": self.auth.value if self.auth is not None else None,
-        }
+    app_data: Optional[AppCheckData] = None
+    """The verified App Check token, if any."""
 
 
-def check_auth_token(req: Request, ctx: CallableRequest) -> TokenStatus:
-    """Validate the auth token in the callable request."""
-    authorization = req.headers.get("Authorization")
-    if authorization is None:
-        return TokenStatus.MISSING
-    match = re.search(r"Bearer (.*)", authorization)
-    if match is not None:
-        try:
-            id_token = match.string
-            auth_token: dict[str, str] = {}
-            auth.verify_id_token(id_token, app=_apps)
-
-            ctx = dataclasses.replace(
-                ctx,
-                auth=AuthData(uid=auth_token["uid"], token=auth_token),
-            )
+_ADMIN_APP: Optional[firebase_admin.App] = None
+_admin_app_lock = threading.Lock()
+
+_TOKEN_CACHE_ENABLED = (os.environ.get("CALLABLE_TOKEN_CACHE_ENABLED", "true")
+                        .lower() not in ("false", "f", "0", "n", "no"))
+"""Whether ID token verifications are cached; set the environment variable
+CALLABLE_TOKEN_CACHE_ENABLED to "false" to verify every request."""
+
+_TOKEN_CACHE_TTL_SECONDS = 300
+"""Longest a verified ID token is reused before it is verified again."""
+
+_TOKEN_CACHE_MAX_SIZE = 10000
+"""Most verified ID tokens kept at once; the least recently used go first."""
 
-            return TokenStatus.VALID
-        except auth.InvalidIdTokenError:
-            logging.error(f"Error validating token: {auth.InvalidIdTokenError}")
-            return TokenStatus.INVALID
-    return TokenStatus.INVALID
+# Token digest -> (expiry, claims).
+_token_cache: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+_token_cache_lock = threading.Lock()
 
 
-def check_app_token(req: Request, ctx: CallableRequest) -> TokenStatus:
-    """Validate the app token in the callable request."""
-    app_check = req.headers.get("X-Firebase-AppCheck")
+def _admin_app() -> firebase_admin.App:
+    """The default Admin SDK app, looked up (or initialized) on first use."""
+    global _ADMIN_APP
+    if _ADMIN_APP is None:
+        # Locked so concurrent first requests don't both initialize the app.
+        with _admin_app_lock:
+            if _ADMIN_APP is None:
+                try:
+                    _ADMIN_APP = firebase_admin.get_app()
+                except ValueError:
+                    _ADMIN_APP = firebase_admin.initialize_app()
+    return _ADMIN_APP
+
+
+def _verify_id_token(id_token: str) -> Optional[dict]:
+    """Verify an ID token, reusing the claims of a recent verification.
+
+    Returns the decoded claims, or None if the token was rejected. Unless
+    _TOKEN_CACHE_ENABLED is off, accepted tokens are remembered until the
+    earlier of their own ``exp`` and _TOKEN_CACHE_TTL_SECONDS. Rejected tokens
+    are never cached, so a token rejected for clock skew can pass on retry.
+    """
+    key = None
+    if _TOKEN_CACHE_ENABLED:
+        key = hashlib.sha256(id_token.encode()).digest()
+        now = time.time()
+        with _token_cache_lock:
+            entry = _token_cache.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    _token_cache.move_to_end(key)
+                    return copy.deepcopy(entry[1])
+                del _token_cache[key]
+    try:
+        claims = auth.verify_id_token(id_token, app=_admin_app())
+    except auth.InvalidIdTokenError as err:
+        logging.error(f"Error validating token: {err}")
+        return None
+    if key is not None:
+        expiry = min(claims["exp"], now + _TOKEN_CACHE_TTL_SECONDS)
+        with _token_cache_lock:
+            _token_cache[key] = (expiry, claims)
+            _token_cache.move_to_end(key)
+            if len(_token_cache) > _TOKEN_CACHE_MAX_SIZE:
+                _token_cache.popitem(last=False)
+    # Copied all the way down so a handler can't change the cached claims.
+    return copy.deepcopy(claims)
+
+
+def check_auth_token(
+    authorization: Optional[str],
+) -> tuple[TokenStatus, Optional[AuthData]]:
+    """Validate the Authorization header of the callable request."""
+    if authorization is None:
+        return TokenStatus.MISSING, None
+    if len(authorization) <= 7 or authorization[:7].lower() != "bearer ":
+        return TokenStatus.INVALID, None
+    auth_token = _verify_id_token(authorization[7:])
+    if auth_token is None:
+        return TokenStatus.INVALID, None
+    return TokenStatus.VALID, AuthData(uid=auth_token["uid"], token=auth_token)
+
+
+@functools.lru_cache(maxsize=None)
+def _warn_app_check_unsupported() -> None:
+    """Warn, once per process, that App Check tokens are not verified."""
+    logging.warning("App check is not supported in the Admin SDK; "
+                    "tokens will pass through unvalidated.")
+
+
+def check_app_token(
+    app_check: Optional[str],
+) -> tuple[TokenStatus, Optional[AppCheckData]]:
+    """Validate the X-Firebase-AppCheck header of the callable request."""
     if app_check is None:
-        return TokenStatus.MISSING
+        return TokenStatus.MISSING, None
 
     # TODO validate the token using the Admin SDK once app check is supported.
     # For now, just assume it's valid.
-    logging.warning("App check is not supported in the Admin SDK.")
-    ctx = dataclasses.replace(ctx, app=None)
-    return TokenStatus.VALID
-
-
-def check_tokens(
-    req: Request,
-    ctx: CallableRequest,
-) -> CallableTokenStatus:
-    """Check tokens"""
-    verifications = CallableTokenStatus()
-
-    verifications.auth = check_auth_token(req, ctx)
-    verifications.app = check_app_token(req, ctx)
-
-    log_payload = {
-        **verifications.to_dict(),
-        "logging.googleapis.com/labels": {
-            "firebase-log-type": "callable-request-verification",
-        },
+    _warn_app_check_unsupported()
+    return TokenStatus.VALID, None
+
+
+def _verification_log_payload(
+    auth_status: TokenStatus,
+    app_status: TokenStatus,
+) -> dict:
+    """Structured log payload describing a callable request verification."""
+    return {
+        "auth": auth_status.value,
+        "app": app_status.value,
+        "logging.googleapis.com/labels": _VERIFICATION_LABELS,
     }
 
+
+def verify_tokens(headers: Headers) -> CallableTokenStatus:
+    """Verify the auth and App Check tokens from the callable request headers
+    in a single pass, logging the outcome.
+    """
+    auth_status, auth_data = check_auth_token(headers.get("Authorization"))
+    app_status, app_data = check_app_token(headers.get("X-Firebase-AppCheck"))
+
     errs = []
-    if verifications.app == TokenStatus.INVALID:
-        errs.append(("AppCheck token was rejected.", log_payload))
+    if app_status is TokenStatus.INVALID:
+        errs.append("AppCheck token was rejected.")
 
-    if verifications.auth == TokenStatus.INVALID:
-        errs.append(("Auth token was rejected.", log_payload))
+    if auth_status is TokenStatus.INVALID:
+        errs.append("Auth token was rejected.")
 
     if len(errs) == 0:
-        logging.info("Callable request verification passed", log_payload)
+        logging.info("Callable request verification passed",
+                     _verification_log_payload(auth_status, app_status))
     else:
-        logging.warning(f"Callable request verification failed: ${errs}",
-                        log_payload)
-
-    # Clears out the content in the logPayload
-    # or it will be persisted in the next call.
-    log_payload.clear()
+        logging.warning(f"Callable request verification failed: {errs}",
+                        _verification_log_payload(auth_status, app_status))
 
-    return verifications
+    return CallableTokenStatus(auth_status, app_status, auth_data, app_data)
 
 
+@dataclass(frozen=True, slots=True)
 class HttpResponseBody:
     """The body of an HTTP response from a callable function."""
 
@@ -352,68 +451,119 @@ class HttpResponseBody:
     error: Optional[HttpsError] = None
 
 
+def _json_default(obj: Any) -> Any:
+    """Encode the types flask's default JSON provider handles and orjson
+    doesn't, the same way flask does."""
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(
+        f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Encode a response body as flask.jsonify would, using orjson."""
+    try:
+        return orjson.dumps(obj, default=_json_default, option=_JSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        # orjson can't encode some values, such as integers wider than 64
+        # bits, that flask's encoder can.
+        return flask_json.dumps(obj).encode()
+
+
+def _json_loads(data: bytes) -> Any:
+    """Decode a request body with orjson, falling back to the stdlib json
+    module for bodies orjson reads differently.
+
+    orjson rejects some bodies json accepts, such as NaN, Infinity, lone
+    surrogates, a byte order mark or UTF-16, and decodes integers wider than
+    64 bits as floats. Only bodies with a run of 19 or more digits are decoded
+    twice; spotting one costs a bytes.translate, not a regex scan.
+    """
+    try:
+        obj = orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
+    if _WIDE_INTEGER_DIGITS in data.translate(_DIGITS_TO_ZEROS):
+        return json.loads(data)
+    return obj
+
+
+def _error_response(err: HttpsError) -> Response:
+    """The callable protocol response for an HttpsError."""
+    return Response(_json_dumps({"error": err.to_dict()}),
+                    status=err.http_error_code.status,
+                    mimetype="application/json")
+
+
 def wrap_on_call_handler(
     func: Callable[[CallableRequest], Any],
     request: Request,
-    response: Response,
-    options: HttpsOptions,
+    allow_invalid_app_check_token: bool,
 ) -> Response:
+    headers = request.headers
     try:
-
-        if not valid_request(request):
+        # Only parse the body once the cheap method and header checks pass,
+        # and only validate it once it has parsed.
+        body: Any = None
+        valid = False
+        if valid_request(request.method, request.mimetype):
+            try:
+                body = _json_loads(request.data)
+            except ValueError:
+                logging.warning("Request body is not valid JSON.")
+            else:
+                valid = valid_body(body)
+
+        if not valid:
             logging.error("Invalid request, unable to process.")
             raise HttpsError(FunctionsErrorCode.INVALID_ARGUMENT, "Bad Request")
 
-        context: CallableRequest = CallableRequest(raw_request=request)
-        token_status = check_tokens(request, context)
+        auth_status, app_status, auth_data, app_data = verify_tokens(headers)
 
-        if token_status.auth == TokenStatus.INVALID:
+        if auth_status is TokenStatus.INVALID:
             raise HttpsError(FunctionsErrorCode.UNAUTHENTICATED,
                              "Unauthenticated")
 
-        if (token_status.app == TokenStatus.INVALID and
-                not options.allow_invalid_app_check_token):
+        if (app_status is TokenStatus.INVALID and
+                not allow_invalid_app_check_token):
             raise HttpsError(FunctionsErrorCode.UNAUTHENTICATED,
                              "Unauthenticated")
 
-        instance_id = request.headers.get("Firebase-Instance-ID-Token")
-        if instance_id is not None:
-            # Validating the token requires an http request, so we don't do it.
-            # If the user wants to use it for something, it will be validated then.
-            # Currently, the only real use case for this token is for sending
-            # pushes with FCM. In that case, the FCM APIs will validate the token.
-            context = dataclasses.replace(
-                context,
-                instance_id_token=request.headers.get(
-                    "Firebase-Instance-ID-Token"),
-            )
-
-        data = json.loads(request.data)
+        # Validating the instance ID token requires an http request, so we
+        # don't do it. If the user wants to use it for something, it will be
+        # validated then. Currently, the only real use case for this token is
+        # for sending pushes with FCM. In that case, the FCM APIs will
+        # validate the token.
+        instance_id = headers.get("Firebase-Instance-ID-Token")
 
         arg: CallableRequest = CallableRequest(
-            raw_request=context.raw_request,
-            data=data,
-            auth=context.auth,
-            app=context.app,
-            instance_id_token=context.instance_id_token,
+            raw_request=request,
+            data=body["data"],
+            app=app_data,
+            auth=auth_data,
+            instance_id_token=instance_id,
         )
 
         result = func(arg)
 
-        response = jsonify(data=result, status=200)
+        encoded = (_EMPTY_RESULT_BODY if result is None
+                   else _json_dumps({"result": result}))
+        return Response(encoded,
+                        status=200,
+                        mimetype="application/json")
+    except HttpsError as err:
+        return _error_response(err)
     # Disable broad exceptions lint since we want to handle all exceptions here
     # and wrap as an HttpsError.
     # pylint: disable=broad-except
     except Exception as err:
-        if not isinstance(err, HttpsError):
-            logging.error("Unhandled error", err)
-            err = HttpsError(FunctionsErrorCode.INTERNAL, "INTERNAL")
-
-        status = err.http_error_code.status
-
-        response = jsonify(error=err.to_dict(), status=status)
-
-    return response
+        logging.error("Unhandled error: %s", err)
+        return _error_response(
+            HttpsError(FunctionsErrorCode.INTERNAL, "INTERNAL"))
 
 
 def on_call(
@@ -476,7 +626,18 @@ def on_call(
         invoker=invoker,
     )
 
-    trigger = {} if callable_options is None else callable_options.metadata()
+    # Read-only so the metadata shared by this decorator can't be mutated
+    # through one of the decorated functions.
+    trigger_template = MappingProxyType(
+        {} if callable_options is None else callable_options.metadata())
+
+    allow_invalid_app_check_token = callable_options.allow_invalid_app_check_token
+
+    # Everything but the entry point is known before the function is.
+    endpoint_kwargs = {
+        "callableTrigger": CallableTrigger(invoker=callable_options.invoker),
+        **_https_endpoint_kwargs(callable_options),
+    }
 
     def wrapper(func):
 
@@ -485,26 +646,12 @@ def on_call(
             return wrap_on_call_handler(
                 func=func,
                 request=request,
-                response=Response(),
-                options=callable_options,
+                allow_invalid_app_check_token=allow_invalid_app_check_token,
             )
 
-        manifest = ManifestEndpoint(
-            entryPoint=func.__name__,
-            callableTrigger=CallableTrigger(invoker=callable_options.invoker),
-            region=callable_options.region,
-            availableMemoryMb=callable_options.memory,
-            timeoutSeconds=callable_options.timeout_sec,
-            minInstances=callable_options.min_instances,
-            maxInstances=callable_options.max_instances,
-            vpc=callable_options.vpc,
-            vpcConnectorEgressSettings=callable_options.vpc_connector_egress_settings,
-            ingressSettings=callable_options.ingress,
-            serviceAccount=callable_options.service_account,
-            secretEnvironmentVariables=callable_options.secrets,
-        )
+        manifest = ManifestEndpoint(entryPoint=func.__name__, **endpoint_kwargs)
 
-        call_view_func.__firebase_trigger__ = trigger
+        call_view_func.__firebase_trigger__ = dict(trigger_template)
         call_view_func.__firebase_endpoint__ = manifest
 
         return call_view_func
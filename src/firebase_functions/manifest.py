@@ -58,7 +58,7 @@ class BlockingTrigger(TypedDict):
 ServiceAccount = str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ManifestEndpoint:
     """An definition of a function as appears in the Manifest."""
 
@@ -90,7 +90,7 @@ class RequiredAPi(TypedDict):
     reason: NotRequired[str]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Manifest:
     endpoints: dict[str, ManifestEndpoint]
     specVersion: str = "v1alpha1"
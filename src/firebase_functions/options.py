@@ -13,9 +13,19 @@ from firebase_functions.params import IntParam, SecretParam, StringParam, Expres
 class Sentinel:
     """Class for USE_DEFAULT."""
 
+    __slots__ = ("description",)
+
     def __init__(self, description):
         self.description = description
 
+    # Sentinels are compared by identity, so copies (e.g. the deep copy made by
+    # dataclasses.asdict) must be the sentinel itself.
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
 
 USE_DEFAULT = Sentinel("Value used to reset an option to factory defaults")
 """ Used to reset a function option to factory default. """
@@ -28,7 +38,7 @@ class VpcEgressSettings(str, Enum):
     ALL_TRAFFIC = "ALL_TRAFFIC"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class VpcOptions:
     """Configuration for a virtual private cloud (VPC).
 
@@ -62,7 +72,7 @@ class Memory(int, Enum):
     GB_8 = 8 << 10
 
 
-@dataclass()
+@dataclass(slots=True)
 class GlobalOptions:
     """Options available for all function types in a codebase.
 
@@ -104,11 +114,18 @@ class GlobalOptions:
     secrets: Union[List[StringParam], SecretParam, Sentinel, None] = None
     labels: Union[str, Expression[str], None] = None
 
+    def _set_from_global_options(self, **values) -> None:
+        """Set each option, falling back to GLOBAL_OPTIONS when it is None."""
+        for name, value in values.items():
+            if value is None:
+                value = getattr(GLOBAL_OPTIONS, name)
+            setattr(self, name, value)
+
     def metadata(self):
         return {
             "reference": self.reference,
             "instance": self.instance,
-            "allowed_origins": self.allowed_methods,
+            "allowed_origins": self.allowed_origins,
             "allowed_methods": self.allowed_methods,
             "region": self.region,
             "memory": self.memory,
@@ -147,9 +164,11 @@ class HttpsOptions(GlobalOptions):
             the default compute service account.
     """
 
-    allow_invalid_app_check_token: Optional[bool] = False
+    __slots__ = ("allow_invalid_app_check_token", "invoker")
 
-    invoker: Optional[list[str]] = None
+    allow_invalid_app_check_token: bool
+
+    invoker: list[str]
 
     def __init__(
         self,
@@ -169,21 +188,20 @@ class HttpsOptions(GlobalOptions):
         invoker=None,
     ):
         super().__init__()
-        self.max_instances = max_instances or GLOBAL_OPTIONS.max_instances
-        self.allowed_methods = allowed_methods or GLOBAL_OPTIONS.allowed_methods
-        self.allowed_origins = allowed_origins or GLOBAL_OPTIONS.allowed_origins
-        self.ingress = ingress or GLOBAL_OPTIONS.ingress
-        self.region = region or GLOBAL_OPTIONS.region
-        self.memory = memory or GLOBAL_OPTIONS.memory
-        self.timeout_sec = timeout_sec or GLOBAL_OPTIONS.timeout_sec
-        self.min_instances = min_instances or GLOBAL_OPTIONS.min_instances
-        self.vpc = vpc or GLOBAL_OPTIONS.vpc
-        self.vpc_connector_egress_settings = (
-            vpc_connector_egress_settings
-            or GLOBAL_OPTIONS.vpc_connector_egress_settings
+        self._set_from_global_options(
+            max_instances=max_instances,
+            allowed_methods=allowed_methods,
+            allowed_origins=allowed_origins,
+            ingress=ingress,
+            region=region,
+            memory=memory,
+            timeout_sec=timeout_sec,
+            min_instances=min_instances,
+            vpc=vpc,
+            vpc_connector_egress_settings=vpc_connector_egress_settings,
+            service_account=service_account,
+            secrets=secrets,
         )
-        self.service_account = service_account or GLOBAL_OPTIONS.service_account
-        self.secrets = secrets or GLOBAL_OPTIONS.secrets
         self.allow_invalid_app_check_token = allow_invalid_app_check_token
         invoker_list = []
         if invoker is not None:
@@ -214,8 +232,10 @@ class PubSubOptions(GlobalOptions):
             the default compute service account.
     """
 
-    topic: Optional[str] = None
-    retry: Optional[bool] = None
+    __slots__ = ("topic", "retry")
+
+    topic: Optional[str]
+    retry: Optional[bool]
 
     def __init__(
         self,
@@ -235,22 +255,20 @@ class PubSubOptions(GlobalOptions):
         retry=None,
     ):
         super().__init__()
-
-        self.max_instances = max_instances or GLOBAL_OPTIONS.max_instances
-        self.allowed_methods = allowed_methods or GLOBAL_OPTIONS.allowed_methods
-        self.allowed_origins = allowed_origins or GLOBAL_OPTIONS.allowed_origins
-        self.ingress = ingress or GLOBAL_OPTIONS.ingress
-        self.region = region or GLOBAL_OPTIONS.region
-        self.memory = memory or GLOBAL_OPTIONS.memory
-        self.timeout_sec = timeout_sec or GLOBAL_OPTIONS.timeout_sec
-        self.min_instances = min_instances or GLOBAL_OPTIONS.min_instances
-        self.vpc = vpc or GLOBAL_OPTIONS.vpc
-        self.vpc_connector_egress_settings = (
-            vpc_connector_egress_settings
-            or GLOBAL_OPTIONS.vpc_connector_egress_settings
+        self._set_from_global_options(
+            max_instances=max_instances,
+            allowed_methods=allowed_methods,
+            allowed_origins=allowed_origins,
+            ingress=ingress,
+            region=region,
+            memory=memory,
+            timeout_sec=timeout_sec,
+            min_instances=min_instances,
+            vpc=vpc,
+            vpc_connector_egress_settings=vpc_connector_egress_settings,
+            service_account=service_account,
+            secrets=secrets,
         )
-        self.service_account = service_account or GLOBAL_OPTIONS.service_account
-        self.secrets = secrets or GLOBAL_OPTIONS.secrets
         self.topic = topic
         self.retry = retry or False
 
@@ -274,6 +292,9 @@ class ReferenceOptions(GlobalOptions):
             the default compute service account.
     """
 
+    __slots__ = ("retry",)
+
+    retry: Optional[bool]
 
     def __init__(
         self,
@@ -297,26 +318,25 @@ class ReferenceOptions(GlobalOptions):
         retry=None,
     ):
         super().__init__()
-        self.reference = reference or GLOBAL_OPTIONS.reference
-        self.instance = instance or GLOBAL_OPTIONS.instance
-        self.region = region or GLOBAL_OPTIONS.region
-        self.memory = memory or GLOBAL_OPTIONS.memory
-        self.timeout_sec = timeout_sec or GLOBAL_OPTIONS.timeout_sec
-        self.max_instances = max_instances or GLOBAL_OPTIONS.max_instances
-        self.min_instances = min_instances or GLOBAL_OPTIONS.min_instances
-        self.concurrency = concurrency or GLOBAL_OPTIONS.concurrency
-        self.cpu = cpu or GLOBAL_OPTIONS.cpu
-        self.vpc_connector_egress_settings = (
-            vpc_connector_egress_settings
-            or GLOBAL_OPTIONS.vpc_connector_egress_settings
+        self._set_from_global_options(
+            reference=reference,
+            instance=instance,
+            region=region,
+            memory=memory,
+            timeout_sec=timeout_sec,
+            max_instances=max_instances,
+            min_instances=min_instances,
+            concurrency=concurrency,
+            cpu=cpu,
+            vpc_connector_egress_settings=vpc_connector_egress_settings,
+            service_account=service_account,
+            labels=labels,
+            allowed_methods=allowed_methods,
+            allowed_origins=allowed_origins,
+            ingress=ingress,
+            vpc=vpc,
+            secrets=secrets,
         )
-        self.service_account = service_account or GLOBAL_OPTIONS.service_account
-        self.labels = labels or GLOBAL_OPTIONS.labels
-        self.allowed_methods = allowed_methods or GLOBAL_OPTIONS.allowed_methods
-        self.allowed_origins = allowed_origins or GLOBAL_OPTIONS.allowed_origins
-        self.ingress = ingress or GLOBAL_OPTIONS.ingress
-        self.vpc = vpc or GLOBAL_OPTIONS.vpc
-        self.secrets = secrets or GLOBAL_OPTIONS.secrets
         self.retry = retry or False
 
 
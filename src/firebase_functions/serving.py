@@ -25,7 +25,7 @@ from firebase_functions.manifest import (
     ManifestEndpoint,
     Manifest,
 )
-from firebase_functions.options import Sentinel
+from firebase_functions.options import USE_DEFAULT
 
 __ALLOWED_METHODS_CALL = ["POST"]
 __ALLOWED_METHODS_REQUEST = ["GET", "POST", "PUT", "DELETE"]
@@ -103,7 +103,7 @@ def clean_nones_and_set_defult(data) -> dict:
     def convert_value(obj):
         if isinstance(obj, Enum):
             return obj.value
-        if isinstance(obj, Sentinel):
+        if obj is USE_DEFAULT:
             return None
 
         return obj
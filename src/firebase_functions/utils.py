@@ -1,13 +1,15 @@
 """Utils for Firebase Functions"""
 
-from typing import Generic, TypeVar, Optional
+from typing import Any, Generic, TypeGuard, TypeVar
 from dataclasses import dataclass
 import datetime as dt
 from functions_framework import logging
-from flask import Request
 
 T = TypeVar("T")
 
+_DATA_KEYSET = frozenset(("data",))
+"""The only key allowed in a callable request body."""
+
 
 @dataclass(frozen=True)
 class CloudEvent(Generic[T]):
@@ -22,69 +24,67 @@ class CloudEvent(Generic[T]):
     data: T
 
 
-def valid_request(request: Request) -> bool:
-    """Validate request"""
-    if (valid_content(request) and valid_keys(request) and
-            valid_type(request) and valid_body(request)):
+def valid_request(method: str, mimetype: str) -> bool:
+    """Validate the request method and Content-Type.
+
+    These checks are cheap, so they run before the body is parsed.
+    """
+    if valid_type(method) and valid_content(mimetype):
         return True
     return False
 
 
-def valid_body(request: Request) -> bool:
-    """The body must not be empty."""
-    if request.json is None:
+def valid_body(body: Any) -> TypeGuard[dict]:
+    """Validate the parsed request body."""
+    if body is None:
         logging.warning("Request is missing body.")
         return False
-    return True
+
+    # The body must have data.
+    if not isinstance(body, dict) or body.get("data") is None:
+        # TODO should we check if data exists or not?
+        logging.warning("Request body is missing data: %s", body)
+        return False
+
+    return valid_keys(body)
 
 
-def valid_type(request: Request) -> bool:
+def valid_type(method: str) -> bool:
     """Make sure it's a POST."""
-    if request.method != "POST":
-        logging.warning("Request has invalid method.", request.method)
+    if method != "POST":
+        logging.warning("Request has invalid method: %s", method)
         return False
     return True
 
 
-def valid_content(request: Request) -> bool:
-    """Validate content"""
-    content_type: Optional[str] = request.headers.get("Content-Type")
+def valid_content(mimetype: str) -> bool:
+    """Validate content
 
-    if content_type is None:
-        logging.warning("Request is missing Content-Type.", content_type)
+    Takes the request's parsed mimetype, which is the lowercased
+    Content-Type without parameters such as charset, or "" if missing.
+    """
+    if not mimetype:
+        logging.warning("Request is missing Content-Type.")
         return False
 
-    # If it has a charset, just ignore it for now.
-    try:
-        semi_colon = content_type.index(";")
-        if semi_colon >= 0:
-            content_type = content_type[0:semi_colon].strip()
-    except ValueError:
-        pass
-
     # Check that the Content-Type is JSON.
-    if content_type != "application/json":
-        logging.warning("Request has incorrect Content-Type.", content_type)
-        return False
-
-    # The body must have data.
-    if request.json is None or request.json["data"] is None:
-        # TODO should we check if data exists or not?
-        logging.warning("Request body is missing data.", request.json)
+    if mimetype != "application/json":
+        logging.warning("Request has incorrect Content-Type: %s", mimetype)
         return False
     return True
 
 
-def valid_keys(request: Request) -> bool:
+def valid_keys(body: dict) -> bool:
     """Verify that the body does not have any extra fields."""
-    assert request.json is not None
-    extra_keys = {
-        key: request.json[key] for key in request.json.keys() if key != "data"
-    }
-    if len(extra_keys) != 0:
-        logging.warning(
-            "Request body has extra fields: ",
-            "".join(f"{key}: {value}," for (key, value) in extra_keys.items()),
-        )
+    # Fast path for the common {"data": ...} body; no set is built.
+    if len(body) == 1 and "data" in body:
+        return True
+
+    extra_keys = body.keys() - _DATA_KEYSET
+    if extra_keys:
+        # Only the names are logged; values may hold user data.
+        if logging.root.isEnabledFor(logging.WARNING):
+            logging.warning("Request body has extra fields: %s",
+                            ", ".join(map(str, extra_keys)))
         return False
     return True
@@ -88,7 +88,7 @@ def test_trigger_view_func():
 
         # Authenticated missing request
         assert (
-            json.loads(res_call.data.decode("utf-8")).get("data")
+            json.loads(res_call.data.decode("utf-8")).get("result")
             == "Auth = None"
         ), 'Unauthenticated response or found request, response "Auth != None"'
 
@@ -99,6 +99,7 @@ def test_trigger_view_func():
             content_type="application/json",
         )
         # Unauthenticated request
+        assert res_call.status_code == 401, "Failure, status_code != 401"
         assert (
             json.loads(res_call.data.decode("utf-8")).get("error")["message"]
             == "Unauthenticated"
@@ -0,0 +1,56 @@
+"""
+Errors unit tests.
+"""
+from firebase_functions.errors import (
+    CanonicalErrorCodeName,
+    FunctionsErrorCode,
+    HttpsError,
+    error_code_map,
+)
+
+
+def test_error_code_map_covers_every_code():
+    """
+    Testing the error code map has an entry for every FunctionsErrorCode,
+    in declaration order.
+    """
+    assert len(error_code_map) == len(FunctionsErrorCode)
+    for code in FunctionsErrorCode:
+        assert error_code_map[code.ordinal].canonical_name.name == code.name.replace(
+            "REASOURCE", "RESOURCE")
+
+
+def test_https_error_to_dict():
+    """
+    Testing HttpsError resolves its status and serializes to the wire format.
+    """
+    err = HttpsError(FunctionsErrorCode.INVALID_ARGUMENT, "Bad Request")
+
+    assert err.http_error_code.status == 400
+    assert err.http_error_code.canonical_name is CanonicalErrorCodeName.INVALID_ARGUMENT
+    assert str(err) == "INVALID_ARGUMENT"
+    assert err.to_dict() == {"status": "INVALID_ARGUMENT", "message": "Bad Request"}
+
+
+def test_https_error_to_dict_details():
+    """
+    Testing HttpsError passes details through unwrapped so they stay
+    JSON-serializable.
+    """
+    err = HttpsError(FunctionsErrorCode.NOT_FOUND, "Missing", {"id": "abc"})
+
+    assert err.to_dict() == {
+        "status": "NOT_FOUND",
+        "message": "Missing",
+        "details": {"id": "abc"},
+    }
+
+
+def test_https_error_accepts_raw_code_string():
+    """
+    Testing HttpsError accepts a raw code string, as the str-based enum allows.
+    """
+    err = HttpsError("not-found", "Missing")
+
+    assert err.http_error_code.status == 404
+    assert err.to_dict() == {"status": "NOT_FOUND", "message": "Missing"}
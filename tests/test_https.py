@@ -0,0 +1,188 @@
+"""
+Https unit tests.
+"""
+import datetime as dt
+import decimal
+import json
+
+import flask
+import pytest
+
+from firebase_functions import https
+from firebase_functions.https import TokenStatus, check_auth_token
+
+
+class FakeVerifier:
+    """Stands in for auth.verify_id_token, counting its calls."""
+
+    def __init__(self, exp: float = 10_000.0):
+        self.calls = 0
+        self.exp = exp
+
+    def __call__(self, id_token, app=None):
+        self.calls += 1
+        if id_token.startswith("bad"):
+            raise https.auth.InvalidIdTokenError("invalid token")
+        return {
+            "uid": id_token,
+            "exp": self.exp,
+            "firebase": {
+                "sign_in_provider": "password"
+            },
+        }
+
+
+@pytest.fixture(name="verifier")
+def fixture_verifier(monkeypatch):
+    """Patches token verification and the clock, and empties the caches."""
+    verifier = FakeVerifier()
+    monkeypatch.setattr(https.auth, "verify_id_token", verifier)
+    monkeypatch.setattr(https, "_admin_app", lambda: None)
+    monkeypatch.setattr(https.time, "time", lambda: 1_000.0)
+    monkeypatch.setattr(https, "_TOKEN_CACHE_ENABLED", True)
+    https._token_cache.clear()  # pylint: disable=protected-access
+    return verifier
+
+
+def test_check_auth_token_cache_hit(verifier):
+    """
+    Testing a verified token is served from the cache on its next use.
+    """
+    status, auth_data = check_auth_token("Bearer alice")
+    assert status is TokenStatus.VALID
+    assert auth_data.uid == "alice"
+
+    # Handlers must not be able to change what the cache hands out next.
+    auth_data.token["uid"] = "mallory"
+    auth_data.token["firebase"]["sign_in_provider"] = "custom"
+
+    status, auth_data = check_auth_token("Bearer alice")
+    assert status is TokenStatus.VALID
+    assert auth_data.uid == "alice"
+    assert auth_data.token["firebase"]["sign_in_provider"] == "password"
+    assert verifier.calls == 1
+
+
+def test_check_auth_token_cache_expiry(verifier, monkeypatch):
+    """
+    Testing cached tokens expire at the earlier of exp and the cache TTL.
+    """
+    verifier.exp = 1_010.0
+    check_auth_token("Bearer alice")
+    monkeypatch.setattr(https.time, "time", lambda: 1_011.0)
+    check_auth_token("Bearer alice")
+    assert verifier.calls == 2
+
+    verifier.exp = 100_000.0
+    check_auth_token("Bearer bob")
+    monkeypatch.setattr(https.time, "time",
+                        lambda: 1_011.0 + https._TOKEN_CACHE_TTL_SECONDS)  # pylint: disable=protected-access
+    check_auth_token("Bearer bob")
+    assert verifier.calls == 4
+
+
+def test_check_auth_token_rejected_token_not_cached(verifier):
+    """
+    Testing a rejected token is verified again on its next use.
+    """
+    assert check_auth_token("Bearer bad")[0] is TokenStatus.INVALID
+    assert check_auth_token("Bearer bad")[0] is TokenStatus.INVALID
+    assert verifier.calls == 2
+
+
+def test_check_auth_token_cache_eviction(verifier, monkeypatch):
+    """
+    Testing the least recently used token is evicted once the cache is full.
+    """
+    monkeypatch.setattr(https, "_TOKEN_CACHE_MAX_SIZE", 2)
+
+    check_auth_token("Bearer alice")
+    check_auth_token("Bearer bob")
+    check_auth_token("Bearer alice")
+    check_auth_token("Bearer carol")
+    assert verifier.calls == 3
+
+    # bob was the least recently used, so only he has to be verified again.
+    check_auth_token("Bearer alice")
+    check_auth_token("Bearer bob")
+    assert verifier.calls == 4
+
+
+def test_check_auth_token_cache_disabled(verifier, monkeypatch):
+    """
+    Testing every request is verified when the cache is disabled.
+    """
+    monkeypatch.setattr(https, "_TOKEN_CACHE_ENABLED", False)
+
+    check_auth_token("Bearer alice")
+    check_auth_token("Bearer alice")
+    assert verifier.calls == 2
+
+
+def call_handler(func, body: bytes) -> flask.Response:
+    """Runs an on_call function against an unauthenticated POST of body."""
+    app = flask.Flask(__name__)
+    with app.test_request_context(method="POST",
+                                  data=body,
+                                  content_type="application/json"):
+        return https.on_call()(func)(flask.request)
+
+
+@pytest.mark.parametrize(
+    "result, expected",
+    [
+        ({1: "a"}, {"1": "a"}),
+        (2**70, 2**70),
+        (decimal.Decimal("1.5"), "1.5"),
+        (dt.datetime(2022, 1, 2, 3, 4, 5), "Sun, 02 Jan 2022 03:04:05 GMT"),
+    ],
+)
+def test_on_call_encodes_results_like_jsonify(result, expected):
+    """
+    Testing callable results that flask.jsonify could encode still encode,
+    to the same JSON.
+    """
+    res = call_handler(lambda req: result, b'{"data": "x"}')
+
+    assert res.status_code == 200
+    assert json.loads(res.get_data()) == {"result": expected}
+
+
+def test_on_call_decodes_wide_integers_exactly():
+    """
+    Testing integers wider than 64 bits in the request reach the handler intact.
+    """
+    res = call_handler(lambda req: req.data == 2**70,
+                       b'{"data": 1180591620717411303424}')
+
+    assert json.loads(res.get_data()) == {"result": True}
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        (b'{"data": Infinity}', float("inf")),
+        (b'{"data": 1e400}', float("inf")),
+        (b'{"data": "\\ud800"}', "\ud800"),
+        (b'\xef\xbb\xbf{"data": "x"}', "x"),
+        ('{"data": "x"}'.encode("utf-16"), "x"),
+    ],
+)
+def test_on_call_decodes_bodies_json_accepts(body, expected):
+    """
+    Testing bodies orjson rejects but the json module accepts still decode.
+    """
+    seen = []
+    res = call_handler(lambda req: seen.append(req.data), body)
+
+    assert res.status_code == 200
+    assert seen == [expected]
+
+
+def test_on_call_rejects_invalid_json():
+    """
+    Testing a body that isn't JSON is rejected as a bad request.
+    """
+    res = call_handler(lambda req: None, b'{"data": 1180591620717411303424')
+
+    assert json.loads(res.get_data())["error"]["status"] == "INVALID_ARGUMENT"
@@ -1,6 +1,8 @@
 """
 Options unit tests.
 """
+import copy
+
 from firebase_functions import options
 
 
@@ -45,3 +47,36 @@ def test_pubsub_options():
     pubsub_options_2 = options.PubSubOptions(topic="Hi", max_instances=3)
 
     assert pubsub_options_2.max_instances != options.GLOBAL_OPTIONS.max_instances
+
+
+def test_options_keep_falsy_values():
+    """
+    Testing that explicitly falsy values are not replaced by the global options.
+    """
+    options.set_global_options(max_instances=1, min_instances=2)
+
+    https_options = options.HttpsOptions(min_instances=0)
+
+    assert https_options.min_instances == 0
+    assert https_options.max_instances == 1
+
+
+def test_options_metadata_allowed_origins():
+    """
+    Testing that the metadata reports allowed_origins, not allowed_methods.
+    """
+    https_options = options.HttpsOptions(allowed_origins="https://example.com",
+                                         allowed_methods="POST")
+
+    metadata = https_options.metadata()
+
+    assert metadata["allowed_origins"] == "https://example.com"
+    assert metadata["allowed_methods"] == "POST"
+
+
+def test_use_default_survives_copies():
+    """
+    Testing that copying USE_DEFAULT, as dataclasses.asdict does, keeps its identity.
+    """
+    assert copy.copy(options.USE_DEFAULT) is options.USE_DEFAULT
+    assert copy.deepcopy(options.USE_DEFAULT) is options.USE_DEFAULT